@@ -3,10 +3,18 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import pathlib
 import re
 import sys
-from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, Tuple
+
+try:
+    import orjson  # optional; much faster than stdlib json on large logs
+except ImportError:
+    orjson = None
 
 
 _APP_ROOT = pathlib.Path(__file__).resolve().parent.parent
@@ -28,48 +36,99 @@ DEFAULT_SKIP_TAGS_FOR_NAME = {
 # Default omit list: empty for a "normal" parse (no tag removals).
 DEFAULT_OMIT_TAGS: set[str] = set()
 
+# Opening tag <...> (no slash). Greedy and anchored on the closing '>' so there is
+# nothing to backtrack over on malformed input; callers rstrip the captured name.
+_OPEN_TAG_RE = re.compile(r"<\s*([^<>/\s][^<>/]*)>")
+# Any leftover <foo> or </foo> marker. One char, then a single greedy class: a lazy run
+# followed by an overlapping class goes quadratic on an unclosed "<aaa..." run
+_LINGERING_TAG_RE = re.compile(r"</?[^<>/][^<>]*>")
+# "Name's Persona" (various apostrophes), as used by JanitorAI persona tags
+_PERSONA_SUFFIX_RE = re.compile(r"^(.+?)[''ʼʻʽ]s\s+persona$", re.IGNORECASE)
+_SANITIZE_RE = re.compile(r"[^0-9A-Za-z _\-()&]+")
+# Any tag marker: group 1 is "/" for closing tags, group 2 the name (plus attributes)
+_TAG_TOKEN_RE = re.compile(r"<(/)?\s*([^<>/\s][^<>/]*)>")
+
+# Output directories already created by this process (skips a mkdir syscall per file)
+_ensured_dirs: set[str] = set()
+
 
 def _replace_literal_newlines(text: str) -> str:
+    # Most prompts already contain real newlines; skip the replace when there is nothing to do
+    if "\\n" not in text:
+        return text
     return text.replace("\\n", "\n")
 
 
-def _compile_tag_pair(name: str) -> Tuple[re.Pattern[str], re.Pattern[str]]:
-    open_re = re.compile(rf"<\s*{re.escape(name)}\b[^>]*>", re.IGNORECASE)
-    close_re = re.compile(rf"</\s*{re.escape(name)}\s*>", re.IGNORECASE)
-    return open_re, close_re
+def _prelowered(text: str) -> Optional[str]:
+    """Return text.lower() if its offsets line up with text, else None.
+
+    Lowercasing a few characters (e.g. "\u0130") changes the string length; callers then
+    fall back to case-insensitive patterns on the original text.
+    """
+    lowered = text.lower()
+    return lowered if len(lowered) == len(text) else None
+
 
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
 
-def _remove_tag_blocks(text: str, name: str) -> str:
-    """Remove every <name>...</name> block, handling nesting.
 
-    If not properly closed, removes through end.
+@lru_cache(maxsize=128)
+def _compile_many(names: frozenset[str], ignore_case: bool = False) -> re.Pattern[str]:
+    """One pattern for the open/close markers of all names; the same sets recur across files."""
+    # Longest first so "<Miku and Nana>" is attributed to that name rather than "miku"
+    alts = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+    return re.compile(
+        rf"<\s*(?P<name>{alts})\b[^>]*>|</\s*(?P<cname>{alts})\s*>",
+        re.IGNORECASE if ignore_case else 0,
+    )
+
+
+def _remove_many_tag_blocks(text: str, names: frozenset[str]) -> str:
+    """Remove every block for any of the given (lowercased) tag names in a single pass.
+
+    Nested blocks of the same name are tracked by depth; unclosed blocks run to the end.
+    Tags of other names nested inside a removed block go with it.
     """
-    open_re, close_re = _compile_tag_pair(name)
-    pos = 0
-    while True:
-        m_open = open_re.search(text, pos)
-        if not m_open:
-            break
-        start = m_open.start()
-        scan = m_open.end()
-        depth = 1
-        end_idx = len(text)
-        while depth > 0:
-            m_next_open = open_re.search(text, scan)
-            m_next_close = close_re.search(text, scan)
-            if not m_next_close:
-                end_idx = len(text)
-                break
-            if m_next_open and m_next_open.start() < m_next_close.start():
+    if not names:
+        return text
+    # Match against the lowered text so group names compare directly; splice from the original
+    lowered = _prelowered(text)
+    if lowered is None:
+        matches = _compile_many(names, ignore_case=True).finditer(text)
+        norm: Callable[[str], str] = str.lower
+    else:
+        matches = _compile_many(names).finditer(lowered)
+        norm = str
+    parts: list[str] = []
+    last = 0
+    active = ""
+    depth = 0
+    for m in matches:
+        opened = m.group("name")
+        if opened is not None:
+            if not active:
+                parts.append(text[last:m.start()])
+                active = norm(opened)
+                depth = 1
+            elif norm(opened) == active:
                 depth += 1
-                scan = m_next_open.end()
-                continue
+            continue
+        if active and norm(m.group("cname")) == active:
             depth -= 1
-            scan = m_next_close.end()
-            end_idx = scan
-        text = text[:start] + text[end_idx:]
-        pos = start
-    return text
+            if depth == 0:
+                active = ""
+                last = m.end()
+    if not active:
+        parts.append(text[last:])
+    return "".join(parts)
+
+
+def _strip_tag_markers(text: str, name: str) -> str:
+    """Unwrap <name ...> / </name> markers (case-insensitive), keeping the content between them."""
+    if "<" not in text:
+        return text
+    return _compile_many(frozenset((name,)), ignore_case=True).sub("", text)
 
 
 def _find_first_non_skipped_tag(text: str, skip_for_name: set[str]) -> Optional[Tuple[str, int, int]]:
@@ -77,39 +136,15 @@ def _find_first_non_skipped_tag(text: str, skip_for_name: set[str]) -> Optional[
 
     Allows spaces in tag name (e.g., "Miku and Nana"). Returns (name, open_start, open_end).
     """
-    open_tag_re = re.compile(r"<\s*([^<>/]+?)\s*>", re.IGNORECASE)
-    for m in open_tag_re.finditer(text):
-        raw = m.group(1)
-        name = raw.strip()
-        if name.lower() in skip_for_name:
-            continue
-        return name, m.start(), m.end()
-    return None
-
-
-def _extract_tag_content(text: str, name: str, open_end: int) -> Tuple[int, int, str]:
-    """Given <name> at open_end, return (content_start, block_end, inner_text)."""
-    open_re, close_re = _compile_tag_pair(name)
-    depth = 1
-    scan = open_end
-    block_end = len(text)
-    inner_end = block_end
-    while depth > 0:
-        m_open = open_re.search(text, scan)
-        m_close = close_re.search(text, scan)
-        if not m_close:
-            break
-        if m_open and m_open.start() < m_close.start():
-            depth += 1
-            scan = m_open.end()
-            continue
-        depth -= 1
-        if depth == 0:
-            inner_end = m_close.start()
-        scan = m_close.end()
-        block_end = scan
-    inner = text[open_end:inner_end]
-    return open_end, block_end, inner
+    pos = 0
+    while True:
+        m = _OPEN_TAG_RE.search(text, pos)
+        if not m:
+            return None
+        name = m.group(1).rstrip()
+        if name.lower() not in skip_for_name:
+            return name, m.start(), m.end()
+        pos = m.end()
 
 
 def _first_assistant_message(data: dict) -> Optional[str]:
@@ -121,52 +156,112 @@ def _first_assistant_message(data: dict) -> Optional[str]:
     return None
 
 
+def _strip_persona_suffix(name: str) -> str:
+    """Strip "'s Persona" suffix from a character name (common JanitorAI pattern).
+
+    Supports various apostrophe characters: ' ' ʼ ʻ ʽ
+    """
+    # Cheap suffix test first; most character tags never reach the regex
+    if name[-7:].lower() != "persona":
+        return name
+    m = _PERSONA_SUFFIX_RE.match(name)
+    return m.group(1).strip() if m else name
+
+
 def _sanitize_filename(name: str) -> str:
-    safe = re.sub(r"[^0-9A-Za-z _\-()&]+", "_", name).strip()
+    safe = _SANITIZE_RE.sub("_", name).strip()
     return safe or "character"
 
 
-def _present_tag_names(text: str) -> set[str]:
-    """Return a set of tag names present in the given text (opening tags only)."""
-    names = set()
-    # basic open-tag scan; keeps names as-lowered, ignores attributes
-    for m in re.finditer(r"<\s*([^<>/]+?)\s*>", text, re.IGNORECASE):
-        raw = m.group(1).strip()
-        nm = raw.split()[0].lower()
-        if nm:
-            names.add(nm)
-    return names
+def _tokenize_tags(text: str) -> list[Tuple[bool, str, int, int]]:
+    """Return (is_close, name, start, end) for every tag marker in one pass; names are lowercased."""
+    return [
+        (m.group(1) is not None, m.group(2).rstrip().lower(), m.start(), m.end())
+        for m in _TAG_TOKEN_RE.finditer(text)
+    ]
 
 
-def _extract_all_tag_inners(text: str, name: str) -> list[str]:
-    """Return a list of inner texts for all <name>..</name> blocks (handles nesting)."""
-    results: list[str] = []
-    open_re, close_re = _compile_tag_pair(name)
-    pos = 0
-    while True:
-        m_open = open_re.search(text, pos)
-        if not m_open:
-            break
-        open_end = m_open.end()
-        depth = 1
-        scan = open_end
-        inner_end = len(text)
-        while depth > 0:
-            m_o = open_re.search(text, scan)
-            m_c = close_re.search(text, scan)
-            if not m_c:
-                break
-            if m_o and m_o.start() < m_c.start():
-                depth += 1
-                scan = m_o.end()
+def _opens_tag(token_name: str, name: str) -> bool:
+    """True if an opening marker named token_name matches <name ...> (name then a word boundary)."""
+    if not token_name.startswith(name):
+        return False
+    n = len(name)
+    after = n < len(token_name) and _is_word_char(token_name[n])
+    return _is_word_char(name[-1]) != after
+
+
+def _tag_blocks(
+    tokens: list[Tuple[bool, str, int, int]],
+    name: str,
+    text_len: int,
+    open_at: int = -1,
+) -> list[Tuple[int, int, int, int]]:
+    """Return (open_start, open_end, inner_end, block_end) for every <name> block, nested ones included.
+
+    Works from _tokenize_tags output, so looking up another tag costs a walk over the
+    markers rather than a rescan of the text. Unclosed blocks run to the end. The marker
+    starting at open_at always opens a block, even when name ends in a non-word character
+    (e.g. "Bob (Knight)") and so fails the word-boundary rule of _opens_tag.
+    """
+    name = name.lower()
+    if not name:
+        return []
+    blocks: list[list[int]] = []
+    stack: list[int] = []
+    last_close_end = -1
+    for is_close, tok, start, end in tokens:
+        if is_close:
+            if tok != name:
                 continue
-            depth -= 1
-            if depth == 0:
-                inner_end = m_c.start()
-            scan = m_c.end()
-        results.append(text[open_end:inner_end])
-        pos = open_end
-    return results
+            last_close_end = end
+            if stack:
+                blk = blocks[stack.pop()]
+                blk[2] = start
+                blk[3] = end
+        elif start == open_at or _opens_tag(tok, name):
+            stack.append(len(blocks))
+            blocks.append([start, end, text_len, text_len])
+    for i in stack:
+        # Unclosed: the block still spans every close seen after it
+        if last_close_end > blocks[i][1]:
+            blocks[i][3] = last_close_end
+    return [tuple(b) for b in blocks]  # type: ignore[misc]
+
+
+def _rebuild_keeping(
+    text: str,
+    keep: Callable[[str], bool],
+    tokens: Optional[list[Tuple[bool, str, int, int]]] = None,
+) -> str:
+    """Drop every tag block whose name is not kept, classifying markers in a single pass.
+
+    keep() receives the lowercased first word of each opening tag. Equivalent to
+    _remove_many_tag_blocks(text, {present names not kept}) without collecting the
+    names first; kept segments are joined once.
+    """
+    parts: list[str] = []
+    last = 0
+    active = ""
+    depth = 0
+    for is_close, tok, start, end in (tokens if tokens is not None else _tokenize_tags(text)):
+        if is_close:
+            if active and tok == active:
+                depth -= 1
+                if depth == 0:
+                    active = ""
+                    last = end
+            continue
+        key = tok.split(None, 1)[0]
+        if active:
+            if key == active:
+                depth += 1
+        elif not keep(key):
+            parts.append(text[last:start])
+            active = key
+            depth = 1
+    if not active:
+        parts.append(text[last:])
+    return "".join(parts)
 
 
 def process_json(
@@ -178,32 +273,40 @@ def process_json(
     strip_tags: Optional[set[str]] = None,
     output_dir: Optional[pathlib.Path] = None,
     suffix: str = "",
+    bom: bool = True,
+    report: Callable[[str], None] = print,
 ) -> Optional[pathlib.Path]:
-    raw = path.read_text(encoding="utf-8-sig")
-    data = json.loads(raw)
+    # report receives the [skip]/[OK] status lines; the CLI prints them, callers can log them
+    # Parse straight from bytes: no up-front decode of the whole log into a str.
+    raw = path.read_bytes().removeprefix(b"\xef\xbb\xbf")
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     messages = data.get("messages", [])
     if not messages:
-        print(f"[skip] {path.name}: no messages array")
+        report(f"[skip] {path.name}: no messages array")
         return None
     if not isinstance(messages[0], dict) or messages[0].get("role") != "system":
-        print(f"[skip] {path.name}: first message is not 'system'")
+        report(f"[skip] {path.name}: first message is not 'system'")
         return None
 
     system_content = messages[0].get("content", "")
     system_content = _replace_literal_newlines(system_content)
+    # Tokenize once; the character, scenario and included blocks are all looked up from this
+    tokens = _tokenize_tags(system_content)
+    content_len = len(system_content)
 
     # Find first non-skipped tag in the original system content
     first = _find_first_non_skipped_tag(system_content, skip_for_name)
     has_char_block = first is not None
     if has_char_block:
         char_name, open_start, open_end = first  # type: ignore[misc]
-        content_start_char, block_end_char, inner_raw = _extract_tag_content(system_content, char_name, open_end)
-        # Strip "'s Persona" suffix from character name (common JanitorAI pattern)
-        # Support various apostrophe characters: ' ' ʼ ʻ ʽ
-        persona_suffix = re.match(r"^(.+?)[''ʼʻʽ]s\s+persona$", char_name, re.IGNORECASE)
-        if persona_suffix:
-            char_name = persona_suffix.group(1).strip()
+        char_block = next(
+            (b for b in _tag_blocks(tokens, char_name, content_len, open_start) if b[0] == open_start),
+            (open_start, open_end, content_len, content_len),
+        )
+        content_start_char, block_end_char = open_end, char_block[3]
+        inner_raw = system_content[open_end:char_block[2]]
+        char_name = _strip_persona_suffix(char_name)
     else:
         # Fallback: no character tag found. Proceed with untagged/scenario/first message handling
         char_name = "character"
@@ -213,6 +316,8 @@ def process_json(
 
     # Clean per rules (apply removals/whitelist, normalize newlines)
     inner_clean = inner_raw
+    # Normalized once; every omit-mode removal below reuses it (and its cached pattern)
+    omit_l = frozenset(t.lower() for t in omit_tags)
     char_name_l = char_name.strip().lower()
     if include_only:
         # If the character tag itself is not selected, drop entire inner block
@@ -220,19 +325,12 @@ def process_json(
             inner_clean = ""
         else:
             # Isolation rule: character content should exclude other included tags.
-            # 1) Remove any tags that are not included
-            present = _present_tag_names(inner_clean)
-            to_remove = {t for t in present if t.lower() not in include_only}
-            for _tag in to_remove:
-                inner_clean = _remove_tag_blocks(inner_clean, _tag)
-            # 2) Also remove any other included tags (children) to avoid duplication
-            included_children = {t for t in present if t.lower() in include_only and t.lower() != char_name_l}
-            for _tag in included_children:
-                inner_clean = _remove_tag_blocks(inner_clean, _tag)
+            # Tags that are not included go, and so do other included tags (children)
+            # to avoid duplication: only the character's own tag is kept.
+            inner_clean = _rebuild_keeping(inner_clean, lambda n: n == char_name_l)
     else:
         # Omit selected tags within the block
-        for _tag in omit_tags:
-            inner_clean = _remove_tag_blocks(inner_clean, _tag)
+        inner_clean = _remove_many_tag_blocks(inner_clean, omit_l)
         # If the character tag itself is omitted, drop the whole inner block
         if char_name_l in omit_tags:
             inner_clean = ""
@@ -243,30 +341,22 @@ def process_json(
 
     # Extract <Scenario> content from the system message (outside of the character block)
     scenario_clean = ""
-    sc_open_re, _ = _compile_tag_pair("scenario")
-    m_sc = sc_open_re.search(system_content)
-    if m_sc:
-        sc_content_start, sc_block_end, sc_inner = _extract_tag_content(system_content, "scenario", m_sc.end())
+    sc_blocks = _tag_blocks(tokens, "scenario", content_len)
+    if sc_blocks:
+        sc_start, sc_content_start, sc_inner_end, sc_block_end = sc_blocks[0]
+        sc_inner = system_content[sc_content_start:sc_inner_end]
         # Only add Scenario if it is outside the selected character block to avoid duplication
-        if (not has_char_block) or (not (content_start_char <= m_sc.start() < block_end_char)):
+        if (not has_char_block) or (not (content_start_char <= sc_start < block_end_char)):
             if include_only:
                 # Keep Scenario only if explicitly selected
                 if "scenario" not in include_only:
                     sc_inner = ""
                 else:
-                    present_sc = _present_tag_names(sc_inner)
-                    # Remove not-included tags
-                    to_remove_sc = {t for t in present_sc if t.lower() not in include_only}
-                    for _tag in to_remove_sc:
-                        sc_inner = _remove_tag_blocks(sc_inner, _tag)
-                    # Isolation: also remove other included tags nested inside Scenario
-                    included_sc = {t for t in present_sc if t.lower() in include_only and t.lower() != "scenario"}
-                    for _tag in included_sc:
-                        sc_inner = _remove_tag_blocks(sc_inner, _tag)
+                    # Remove not-included tags, and (isolation) other included tags nested inside Scenario
+                    sc_inner = _rebuild_keeping(sc_inner, lambda n: n == "scenario")
             else:
                 # Omit inner tags first
-                for _tag in omit_tags:
-                    sc_inner = _remove_tag_blocks(sc_inner, _tag)
+                sc_inner = _remove_many_tag_blocks(sc_inner, omit_l)
                 # If Scenario itself is omitted, drop it
                 if "scenario" in omit_tags:
                     sc_inner = ""
@@ -278,12 +368,9 @@ def process_json(
     # This is any text outside of recognized <tag>...</tag> blocks.
     untagged_clean = ""
     try:
-        present_all = _present_tag_names(system_content)
-        stripped = system_content
-        for nm in list(present_all):
-            stripped = _remove_tag_blocks(stripped, nm)
+        stripped = _rebuild_keeping(system_content, lambda n: False, tokens)
         # Remove any lingering tag markers like <foo> or </foo>
-        stripped = re.sub(r"</?[^<>/]+?[^<>]*>", "", stripped)
+        stripped = _LINGERING_TAG_RE.sub("", stripped)
         stripped = _replace_literal_newlines(stripped).strip()
         if include_only is not None:
             # Include only if explicitly selected
@@ -306,17 +393,11 @@ def process_json(
         for tag in include_only:
             if tag in {char_name_l, "scenario", "first_message"}:
                 continue
-            for inner in _extract_all_tag_inners(system_content, tag):
-                inner2 = inner
-                # Apply same filtering rules to inner2
-                present = _present_tag_names(inner2)
-                # Remove not-included tags first
-                to_remove = {t for t in present if t.lower() not in include_only}
-                for _tag in to_remove:
-                    inner2 = _remove_tag_blocks(inner2, _tag)
-                # Isolation: also remove other included tags so this tag's output is exclusive
-                for _tag in {t for t in present if t.lower() in include_only and t.lower() != tag}:
-                    inner2 = _remove_tag_blocks(inner2, _tag)
+            for _, blk_open_end, blk_inner_end, _ in _tag_blocks(tokens, tag, content_len):
+                inner2 = system_content[blk_open_end:blk_inner_end]
+                # Apply same filtering rules to inner2: remove not-included tags, and
+                # (isolation) other included tags so this tag's output is exclusive
+                inner2 = _rebuild_keeping(inner2, lambda n: n == tag)
                 for _tag in (strip_tags or ()):  # type: ignore[func-returns-value]
                     inner2 = _strip_tag_markers(inner2, _tag)
                 inner2 = _replace_literal_newlines(inner2).strip()
@@ -383,10 +464,13 @@ def process_json(
 
     # Determine output destination
     dest_dir = output_dir if output_dir else path.parent
-    try:
-        pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
+    dest_key = os.fspath(dest_dir)
+    if dest_key not in _ensured_dirs:
+        try:
+            pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
+            _ensured_dirs.add(dest_key)
+        except Exception:
+            pass
 
     safe_name = _sanitize_filename(char_name)
     suffix_norm = suffix.strip()
@@ -395,11 +479,66 @@ def process_json(
     else:
         filename = f"{safe_name}.txt"
     out_path = dest_dir / filename
-    out_path.write_text(out_text, encoding="utf-8-sig")
-    print(f"[OK] {path.name} → {out_path.name} ({len(out_text)} bytes)")
+    # Encode once and write raw bytes; the BOM is prepended literally rather than via a codec
+    out_bytes = out_text.encode("utf-8")
+    if bom:
+        out_bytes = b"\xef\xbb\xbf" + out_bytes
+    try:
+        out_path.write_bytes(out_bytes)
+    except FileNotFoundError:
+        # Directory was removed since it was cached (e.g. a long-lived caller deleted it)
+        _ensured_dirs.discard(dest_key)
+        pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(out_bytes)
+    report(f"[OK] {path.name} → {out_path.name} ({len(out_text)} bytes)")
     return out_path
 
 
+def parse_file(
+    json_path: pathlib.Path,
+    *,
+    mode: str = "default",
+    include_tags: Iterable[str] = (),
+    exclude_tags: Iterable[str] = (),
+    output_dir: Optional[pathlib.Path] = None,
+    suffix: str = "",
+    bom: bool = True,
+    report: Callable[[str], None] = print,
+) -> Optional[pathlib.Path]:
+    """Parse one log in-process, with the options the CLI takes non-interactively.
+
+    mode="custom" mirrors --preset custom with --include-tags / --omit-tags; with
+    neither, it includes nothing (--include-mode). Status lines go to report (print by
+    default). Returns the written path or None.
+    """
+    skip_for_name = set(DEFAULT_SKIP_TAGS_FOR_NAME)
+    omit_tags: set[str] = set(DEFAULT_OMIT_TAGS)
+    include_only: Optional[set[str]] = None
+    if str(mode).lower() == "custom":
+        include = {str(t).strip().lower() for t in include_tags if str(t).strip()}
+        exclude = {str(t).strip().lower() for t in exclude_tags if str(t).strip()}
+        if include:
+            include_only = include
+        if exclude:
+            omit_tags = exclude
+        # Always keep persona tags out of name detection
+        skip_for_name.update(("persona", "userpersona"))
+        if include_only is None and not omit_tags:
+            include_only = set()
+    else:
+        omit_tags = set()
+    return process_json(
+        json_path,
+        omit_tags=omit_tags,
+        skip_for_name=skip_for_name,
+        include_only=include_only,
+        output_dir=output_dir,
+        suffix=suffix,
+        bom=bom,
+        report=report,
+    )
+
+
 def _prompt_choice(prompt: str, choices: list[str], default: str) -> str:
     while True:
         raw = input(f"{prompt} {choices} [default: {default}]: ").strip().lower()
@@ -417,7 +556,7 @@ def _prompt_tags(prompt: str) -> set[str]:
     return {t.strip().lower() for t in raw.split(',') if t.strip()}
 
 
-def _parse_args(argv: list[str]) -> tuple[list[pathlib.Path], set[str], set[str], Optional[set[str]], Optional[set[str]], Optional[pathlib.Path], str]:
+def _parse_args(argv: list[str]) -> tuple[list[pathlib.Path], set[str], set[str], Optional[set[str]], Optional[set[str]], Optional[pathlib.Path], str, bool, int, str]:
     parser = argparse.ArgumentParser(description="Parse Janitor logs into character sheets.")
     parser.add_argument("paths", nargs="*", help="JSON files to process (defaults to logs/*.json)")
     parser.add_argument("--preset", choices=["default", "custom"], default=None,
@@ -434,11 +573,21 @@ def _parse_args(argv: list[str]) -> tuple[list[pathlib.Path], set[str], set[str]
                         help="directory to place parsed .txt outputs; defaults next to each JSON")
     parser.add_argument("--suffix", dest="suffix", default="",
                         help="optional suffix to append before .txt to version outputs (e.g., 2025-08-31_12-00-00__abcd1234)")
+    parser.add_argument("--no-bom", dest="bom", action="store_false",
+                        help="write outputs as plain UTF-8 without a byte order mark")
+    parser.add_argument("--jobs", dest="jobs", type=int, default=0,
+                        help="worker processes for multi-file runs (0=one per CPU, 1=sequential)")
+    parser.add_argument("--batch", dest="batch", default="", metavar="FILE",
+                        help="read NDJSON job records from FILE ('-' for stdin) instead of paths")
 
     ns = parser.parse_args(argv)
+    batch: str = str(ns.batch or "").strip()
 
     # Targets
-    if ns.paths:
+    if batch:
+        # Records supply the paths
+        targets = []
+    elif ns.paths:
         targets = [pathlib.Path(a) for a in ns.paths]
     else:
         if not LOGS_DIR.is_dir():
@@ -449,7 +598,7 @@ def _parse_args(argv: list[str]) -> tuple[list[pathlib.Path], set[str], set[str]
             print(f"[INFO] scanning {len(targets)} json files in '{LOGS_DIR}'")
 
     # Determine interactive vs non-interactive default behavior
-    interactive = sys.stdin.isatty() and sys.stdout.isatty()
+    interactive = sys.stdin.isatty() and sys.stdout.isatty() and not batch
     preset = ns.preset or ("custom" if interactive else "default")
 
     # Build skip list (name detection) and tag filters
@@ -499,35 +648,114 @@ def _parse_args(argv: list[str]) -> tuple[list[pathlib.Path], set[str], set[str]
     if str(ns.output_dir or "").strip():
         output_dir = pathlib.Path(str(ns.output_dir).strip())
     suffix: str = str(ns.suffix or "").strip()
+    jobs = max(0, int(ns.jobs or 0))
 
-    return targets, omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix
+    return targets, omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix, ns.bom, jobs, batch
+
+
+def _tag_field(value: object) -> set[str]:
+    """Normalize a batch record's tag field (list or comma-separated string) to lowercased names."""
+    items = value.split(",") if isinstance(value, str) else (value or [])
+    return {str(t).strip().lower() for t in items if str(t).strip()}  # type: ignore[union-attr]
+
+
+def _read_batch(source: str, defaults: tuple) -> tuple[list[tuple], bool]:
+    """Build _process_one jobs from NDJSON records (one JSON object per line).
+
+    Each record needs "path"; optional "omit_tags", "include_tags", "strip_tags"
+    (lists or comma-separated strings), "output_dir" and "suffix" override the
+    command-line values in defaults. Returns (jobs, had_error).
+    """
+    omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix, bom = defaults
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    work: list[tuple] = []
+    had_error = False
+    try:
+        for lineno, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+                path = pathlib.Path(rec["path"])
+                rec_skip = skip_for_name
+                if any(k in rec for k in ("omit_tags", "include_tags", "strip_tags")):
+                    # Same as the custom preset: persona tags never name the character
+                    rec_skip = skip_for_name | {"persona", "userpersona"}
+                job = (
+                    path,
+                    _tag_field(rec["omit_tags"]) if "omit_tags" in rec else omit_tags,
+                    rec_skip,
+                    _tag_field(rec["include_tags"]) if "include_tags" in rec else include_only,
+                    _tag_field(rec["strip_tags"]) if "strip_tags" in rec else strip_tags,
+                    pathlib.Path(rec["output_dir"]) if rec.get("output_dir") else output_dir,
+                    str(rec.get("suffix") or suffix).strip(),
+                    bom,
+                )
+            except (ValueError, KeyError, TypeError) as exc:
+                print(f"[ERR] batch line {lineno}: invalid record ({exc!r})")
+                had_error = True
+                continue
+            work.append(job)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return work, had_error
+
+
+# Below this many files a process pool costs more to start than it saves
+_PARALLEL_MIN_FILES = 4
+
+
+def _process_one(job: tuple) -> tuple[str, bool, Optional[str]]:
+    """Run process_json for one target; returns (name, ok, error). Picklable for worker processes."""
+    t, omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix, bom = job
+    try:
+        ok = process_json(
+            t,
+            omit_tags=omit_tags,
+            skip_for_name=skip_for_name,
+            include_only=include_only,
+            strip_tags=strip_tags,
+            output_dir=output_dir,
+            suffix=suffix,
+            bom=bom,
+        ) is not None
+        return t.name, ok, None
+    except Exception as exc:
+        return t.name, False, str(exc)
 
 
 def main(argv: list[str] | None = None) -> None:
     argv = argv or sys.argv[1:]
-    targets, omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix = _parse_args(argv)
-    if not targets:
+    targets, omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix, bom, jobs, batch = _parse_args(argv)
+    defaults = (omit_tags, skip_for_name, include_only, strip_tags, output_dir, suffix, bom)
+    had_error = False
+    if batch:
+        # One interpreter for the whole stream instead of one per file
+        work, had_error = _read_batch(batch, defaults)
+    else:
+        work = [(t, *defaults) for t in targets]
+    if not work:
+        if had_error:
+            sys.exit(1)
         return
 
     done = 0
-    had_error = False
-    for t in targets:
-        try:
-            if process_json(
-                t,
-                omit_tags=omit_tags,
-                skip_for_name=skip_for_name,
-                include_only=include_only,
-                strip_tags=strip_tags,
-                output_dir=output_dir,
-                suffix=suffix,
-            ):
-                done += 1
-        except Exception as exc:
-            print(f"[ERR] {t.name}: {exc}")
+    if jobs != 1 and len(work) >= _PARALLEL_MIN_FILES:
+        # Files are independent and the work is CPU-bound regex, so use processes (not threads)
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as ex:
+            results = list(ex.map(_process_one, work, chunksize=4))
+    else:
+        results = map(_process_one, work)
+    for name, ok, err in results:
+        if err is not None:
+            print(f"[ERR] {name}: {err}")
             had_error = True
+        elif ok:
+            done += 1
     if len(argv or []) != 1 and done:
-        print(f"[SUMMARY] finished {done}/{len(targets)} files")
+        print(f"[SUMMARY] finished {done}/{len(work)} files")
 
     if had_error:
         sys.exit(1)
@@ -1,29 +1,49 @@
 from __future__ import annotations
 
-import datetime as dt
+import atexit
+import hashlib
+import heapq
 import json
 import logging
+import math
 import os
 import pathlib
+import queue
+import shutil
 import string
 import re
 import subprocess
 import sys
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 import requests
+from urllib3.util.retry import Retry
 from flask import Flask, Response, jsonify, request, stream_with_context, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
-# Import tag utilities from parser (handles both module and direct execution)
 try:
-    from app.parser.parser import _compile_tag_pair, _remove_tag_blocks
+    import orjson  # optional; C-accelerated JSON for logs and API payloads
 except ImportError:
-    from parser.parser import _compile_tag_pair, _remove_tag_blocks
+    orjson = None
+
+# Import the in-process parser entry point (handles both module and direct execution)
+try:
+    from app.parser.parser import parse_file
+except ImportError:
+    from parser.parser import parse_file
 
 
 # ── .env loader ──────────────────────────────────────────────
+# KEY=VALUE per line, whitespace around both trimmed; lines starting with '#' and lines
+# without '=' never match. Values are taken verbatim (no inline comments).
+_DOTENV_LINE_RE = re.compile(r"^[^\S\n]*([^#\s=][^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$", re.MULTILINE)
+
 def _load_dotenv() -> None:
     """Load .env file from repo root if it exists. Env vars take precedence."""
     # Find repo root (parent of app/)
@@ -35,24 +55,13 @@ def _load_dotenv() -> None:
         return
 
     try:
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                # Parse KEY=VALUE
-                if '=' in line:
-                    key, _, value = line.partition('=')
-                    key = key.strip()
-                    value = value.strip()
-                    # Remove surrounding quotes
-                    if (value.startswith('"') and value.endswith('"')) or \
-                       (value.startswith("'") and value.endswith("'")):
-                        value = value[1:-1]
-                    # Only set if not already defined
-                    if key and key not in os.environ:
-                        os.environ[key] = value
+        for m in _DOTENV_LINE_RE.finditer(env_file.read_text(encoding='utf-8')):
+            key, value = m.group(1), m.group(2)
+            # Remove surrounding quotes
+            if value[:1] in ('"', "'") and value.endswith(value[0]):
+                value = value[1:-1]
+            # Only set if not already defined
+            os.environ.setdefault(key, value)
     except Exception:
         pass
 
@@ -81,6 +90,7 @@ def _load_config() -> Dict[str, Any]:
             "allowed_origins": allowed_list,
             "connect_timeout": env("CONNECT_TIMEOUT", 5.0, float),
             "read_timeout": env("READ_TIMEOUT", 300.0, float),
+            "threads": env("SERVER_THREADS", 32, int),
         },
         "openrouter": {
             "url": os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions"),
@@ -128,10 +138,40 @@ BASE_DIR = pathlib.Path(__file__).parent
 LOG_DIR = (BASE_DIR / CONFIG["logging"].get("directory", "var/logs")).resolve(); LOG_DIR.mkdir(parents=True, exist_ok=True)
 PARSED_ROOT = (LOG_DIR / "parsed").resolve(); PARSED_ROOT.mkdir(parents=True, exist_ok=True)
 MAX_LOG_FILES = CONFIG["logging"]["max_files"]
+MAX_MESSAGES = CONFIG["security"]["max_messages"]
+MAX_MODEL_LEN = CONFIG["security"]["max_model_length"]
+VALIDATE_REQUESTS = CONFIG["security"]["validate_requests"]
 GEN_CFG = CONFIG["openrouter"]["defaults"].copy()
 STARTED_MONO = time.monotonic()
 STARTED_EPOCH = time.time()
 
+def _json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes (orjson when installed)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _has_nonfinite(obj: Any) -> bool:
+    """True if obj holds a NaN/Infinity float, which orjson writes as null instead of raising."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(v) for v in obj)
+    return False
+
+def _json_bytes(obj: Any) -> bytes:
+    """Pretty-printed UTF-8 JSON for files we write (orjson when installed)."""
+    if orjson is not None:
+        try:
+            out = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib handles them
+        else:
+            # Only walk the payload when a null could be a swallowed NaN/Infinity
+            if b"null" not in out or not _has_nonfinite(obj):
+                return out
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 # Parser settings (mutable at runtime, persisted under var/state)
 _PARSER_SETTINGS_PATH = (BASE_DIR / "var/state/parser_settings.json").resolve()
 _PARSER_SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -145,7 +185,8 @@ def _load_parser_settings() -> Dict[str, Any]:
     }
     try:
         if _PARSER_SETTINGS_PATH.exists():
-            disk = json.loads(_PARSER_SETTINGS_PATH.read_text(encoding="utf-8"))
+            raw = _PARSER_SETTINGS_PATH.read_bytes()
+            disk = _json_loads(raw)
             if isinstance(disk, dict):
                 if "preset" in disk or "omit_tags" in disk or "include_tags" in disk:
                     preset = str(disk.get("preset", "default")).lower()
@@ -166,13 +207,55 @@ def _load_parser_settings() -> Dict[str, Any]:
         log.warning(f"Failed to read parser_settings.json: {e}")
     return base
 
+# Loaded on first use rather than at import, and re-read only when the file changes on disk
+_PARSER_SETTINGS: Optional[Dict[str, Any]] = None
+_PARSER_SETTINGS_MTIME: Optional[int] = None
+_PARSER_SETTINGS_LOCK = threading.Lock()
+
+def _parser_settings_mtime() -> Optional[int]:
+    try:
+        return _PARSER_SETTINGS_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _parser_settings() -> Dict[str, Any]:
+    """Current parser settings; one stat() per call, a disk read only after a change."""
+    global _PARSER_SETTINGS, _PARSER_SETTINGS_MTIME
+    mtime = _parser_settings_mtime()
+    with _PARSER_SETTINGS_LOCK:
+        if _PARSER_SETTINGS is None or mtime != _PARSER_SETTINGS_MTIME:
+            _PARSER_SETTINGS = _load_parser_settings()
+            _PARSER_SETTINGS_MTIME = mtime
+        return _PARSER_SETTINGS
+
 def _save_parser_settings(settings: Dict[str, Any]) -> None:
+    global _PARSER_SETTINGS, _PARSER_SETTINGS_MTIME
     try:
-        _PARSER_SETTINGS_PATH.write_text(json.dumps(settings, ensure_ascii=False, indent=2), encoding="utf-8")
+        _PARSER_SETTINGS_PATH.write_bytes(_json_bytes(settings))
     except Exception as e:
         log.warning(f"Failed to write parser_settings.json: {e}")
+    # The new settings are live even if persisting failed
+    with _PARSER_SETTINGS_LOCK:
+        _PARSER_SETTINGS = settings
+        _PARSER_SETTINGS_MTIME = _parser_settings_mtime()
 
-PARSER_SETTINGS = _load_parser_settings()
+def _parser_flags(settings: Dict[str, Any]) -> tuple[str, ...]:
+    """Translate parser settings into parser.py preset/tag flags."""
+    mode = str(settings.get("mode", "default")).lower()
+    if mode != "custom":
+        return ("--preset", "default")
+    include_tags = [str(x).strip() for x in settings.get("include_tags", []) if str(x).strip()]
+    exclude_tags = [str(x).strip() for x in settings.get("exclude_tags", []) if str(x).strip()]
+    # Always run in custom preset; choose include or omit flags accordingly
+    if include_tags:
+        return ("--preset", "custom", "--include-tags", ",".join(include_tags))
+    if exclude_tags:
+        return ("--preset", "custom", "--omit-tags", ",".join(exclude_tags))
+    # Force include-only mode with an empty include set (include nothing)
+    return ("--preset", "custom", "--include-mode")
+
+_PARSER_PATH = BASE_DIR / "parser" / "parser.py"
+_PARSER_CMD_PREFIX = (sys.executable, str(_PARSER_PATH))
 
 # Shared parameter bounds
 BOUNDS = {
@@ -184,46 +267,101 @@ BOUNDS = {
 
 # ── session ──────────────────────────────────────────────────
 sess = requests.Session()
-adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=3)
+# Every request goes to one host, so keep a few pools with many reusable connections;
+# threaded Flask workers otherwise overflow a pool of 10 and pay a fresh TLS handshake.
+# Retries cover connection setup only: a completion POST that got a response is never replayed.
+adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=64,
+    pool_block=False,
+    max_retries=Retry(total=3, read=False, backoff_factor=0.2),
+)
 sess.mount("http://", adapter); sess.mount("https://", adapter)
 sess.headers.update({
     "Content-Type": "application/json",
     "Referer": "https://janitorai.com/",
     "X-Title": "JanitorAI-Local-Proxy",
 })
+# Resolve proxy/CA environment settings once for the single upstream URL. With trust_env
+# on, requests re-reads them (and looks up ~/.netrc) while merging settings on every call.
+sess.proxies.update(requests.utils.get_environ_proxies(OPENROUTER_URL))
+sess.verify = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or True
+sess.trust_env = False
 _do_post   = lambda **kw: sess.post(OPENROUTER_URL, timeout=TIMEOUT, **kw)
 _do_stream = lambda **kw: sess.post(OPENROUTER_URL, stream=True, timeout=TIMEOUT, **kw)
 
 # ── utils ────────────────────────────────────────────────────
+def _utc_now_ms() -> tuple[time.struct_time, int]:
+    """Current UTC time as (struct_time, milliseconds), without datetime/strftime."""
+    ns = time.time_ns()
+    return time.gmtime(ns // 1_000_000_000), (ns // 1_000_000) % 1000
+
 def _ts() -> str:
-    now = dt.datetime.now(dt.timezone.utc)
-    return now.strftime("%Y-%m-%d_%H-%M-%S_%f")[:-3]
+    t, ms = _utc_now_ms()
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}_{t.tm_hour:02d}-{t.tm_min:02d}-{t.tm_sec:02d}_{ms:03d}"
 
+# ASCII bytes _safe_name drops; non-ASCII characters are dropped by the encode step
+_SAFE_NAME_ALLOWED = frozenset(string.ascii_letters + string.digits + "-_ .")
+_SAFE_NAME_DELETE = bytes(b for b in range(128) if chr(b) not in _SAFE_NAME_ALLOWED)
+
+@lru_cache(maxsize=2048)
 def _safe_name(seed: str) -> str:
-    allowed = set(string.ascii_letters + string.digits + "-_ .")
-    s = "".join(c for c in (seed or "") if c in allowed).strip()[:100]
+    s = (seed or "").encode("ascii", "ignore").translate(None, _SAFE_NAME_DELETE).decode("ascii").strip()[:100]
     return s or "log"
 
+def _norm_list(v) -> list[str]:
+    """Tag/file list from a JSON body: a comma-separated string or an array, blanks dropped."""
+    if isinstance(v, str):
+        return [s.strip() for s in v.split(',') if s.strip()]
+    if isinstance(v, list):
+        return [str(s).strip() for s in v if str(s).strip()]
+    return []
+
 def _prune_logs() -> None:
-    files = sorted(LOG_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-    for old in files[MAX_LOG_FILES:]:
+    # One scandir pass (stat comes with the entry) and a partial selection of the oldest,
+    # instead of sorting every log by mtime
+    entries = []
+    with os.scandir(LOG_DIR) as it:
+        for e in it:
+            if e.name.endswith(".json") and e.is_file():
+                try:
+                    entries.append((e.stat().st_mtime, e.path, e.name))
+                except OSError:
+                    continue
+    excess = len(entries) - MAX_LOG_FILES
+    if excess <= 0:
+        return
+    for _, path, name in heapq.nsmallest(excess, entries):
         try:
-            old.unlink()
+            os.unlink(path)
         except Exception as e:
-            log.warning(f"Failed to delete old log {old.name}: {e}")
+            log.warning(f"Failed to delete old log {name}: {e}")
+
+# LF or CRLF (a lone CR is left alone), for one-pass CRLF normalization
+_NEWLINE_RE = re.compile(r"\r?\n")
+
+# Handler regexes, compiled once instead of per request / per exported file
+# <name ...> (group 1 empty) or </name>; neither may contain '<', '>' or a further '/'
+_TAG_MARKER_RE = re.compile(r"<(/?)\s*([^<>/]+?)\s*>")
+# Stray <name ...> / </name ...> markers. Same matches as r"</?[^<>/]+?[^<>]*>", but with no
+# overlapping lazy/greedy classes, so an unclosed "<aaa..." run is linear instead of quadratic
+_TAG_STRIP_RE = re.compile(r"</?[^<>/][^<>]*>")
+_VERSION_SUFFIX_RE = re.compile(r"\.v\d+$")
+_FILENAME_SCRUB_RE = re.compile(r"[^0-9A-Za-z _\-()&]+")
 
 def _build_sillytavern_json(name: str, description: str, scenario: str, first_mes: str) -> dict:
     """Build a SillyTavern-compatible character card JSON (chara_card_v3 spec)."""
     # Normalize newlines to \r\n for SillyTavern compatibility
     def norm(s: str) -> str:
-        return s.replace('\r\n', '\n').replace('\n', '\r\n').strip()
+        return _NEWLINE_RE.sub('\r\n', s).strip()
     
     name = name.strip()
     description = norm(description)
     scenario = norm(scenario)
     first_mes = norm(first_mes)
     
-    now = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    t, ms = _utc_now_ms()
+    now = f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}.{ms:03d}Z"
     
     return {
         "name": name,
@@ -269,35 +407,65 @@ def _build_sillytavern_json(name: str, description: str, scenario: str, first_me
     }
 
 
-def _save_log(payload: dict) -> None:
+def _write_log(payload: dict, ts: str) -> None:
     try:
-        path = LOG_DIR / f"{_safe_name(_ts())}.json"
-        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-        _prune_logs()
+        stem = _safe_name(ts)
+        path = LOG_DIR / f"{stem}.json"
+        n = 1
+        while path.exists():
+            # Requests queued within the same millisecond share a timestamp
+            path = LOG_DIR / f"{stem}_{n}.json"
+            n += 1
+        path.write_bytes(_json_bytes(payload))
 
-        parser = pathlib.Path(__file__).parent / "parser" / "parser.py"
-        if parser.exists():
-            try:
-                # Build parser args based on current settings
-                args = _build_parser_args(path)
-                res = subprocess.run(args, capture_output=True, text=True)
-                if res.stdout.strip(): log.debug(f"Parser stdout: {res.stdout.strip()}")
-                if res.stderr.strip(): log.warning(f"Parser stderr: {res.stderr.strip()}")
-            except Exception as e:
-                log.warning(f"Parser.py failed: {e}")
+        try:
+            # Parse in-process with the current settings; status lines go to the debug log
+            settings = _parser_settings()
+            written = parse_file(
+                path,
+                mode=str(settings.get("mode", "default")),
+                include_tags=settings.get("include_tags", []),
+                exclude_tags=settings.get("exclude_tags", []),
+                output_dir=_parsed_output_dir_for(path),
+                suffix=_next_version_suffix_for(path),
+                report=lambda msg: log.debug(f"Parser output: {msg}"),
+            )
+            if written is not None:
+                _adjust_parsed_total(1)
+        except Exception as e:
+            log.warning(f"Parser failed: {e}")
     except Exception as e:
         log.error(f"Failed to save log: {e}")
 
-def _next_version_suffix_for(json_path: pathlib.Path) -> str:
-    """Return next human-friendly version label like 'v3' for parsed TXT outputs.
+# Log writes, pruning and parsing run on one background thread, off the request path
+_LOG_Q: "queue.Queue[tuple[dict, str]]" = queue.Queue()
 
-    Versioning is scoped to the parsed directory for this JSON's stem.
-    """
-    base_dir = _parsed_output_dir_for(json_path)
-    try:
-        base_dir.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
+def _log_worker() -> None:
+    while True:
+        payload, ts = _LOG_Q.get()
+        try:
+            _write_log(payload, ts)
+            # Prune once a burst of requests has been written rather than after every file
+            if _LOG_Q.empty():
+                _prune_logs()
+        except Exception as e:
+            log.error(f"Log worker error: {e}")
+        finally:
+            _LOG_Q.task_done()
+
+def _save_log(payload: dict) -> None:
+    """Queue a request payload for the log worker; the timestamp (file name) is taken now."""
+    _LOG_Q.put_nowait((payload, _ts()))
+
+threading.Thread(target=_log_worker, name="log-writer", daemon=True).start()
+# Let queued logs finish writing on shutdown
+atexit.register(_LOG_Q.join)
+
+# Highest version handed out per parsed directory; filled by one scan, then incremented
+_VERSION_CACHE: Dict[str, int] = {}
+_VERSION_LOCK = threading.Lock()
+
+def _scan_max_version(base_dir: pathlib.Path) -> int:
     max_v = 0
     try:
         for p in base_dir.glob("*.v*.txt"):
@@ -312,7 +480,54 @@ def _next_version_suffix_for(json_path: pathlib.Path) -> str:
                 continue
     except Exception:
         pass
-    return f"v{max_v + 1}"
+    return max_v
+
+def _next_version_suffix_for(json_path: pathlib.Path) -> str:
+    """Return next human-friendly version label like 'v3' for parsed TXT outputs.
+
+    Versioning is scoped to the parsed directory for this JSON's stem. The directory
+    is scanned once; later calls reserve the next number from _VERSION_CACHE.
+    """
+    base_dir = _parsed_output_dir_for(json_path)
+    key = str(base_dir)
+    with _VERSION_LOCK:
+        cur = _VERSION_CACHE.get(key)
+        if cur is None:
+            try:
+                base_dir.mkdir(parents=True, exist_ok=True)
+            except Exception:
+                pass
+            cur = _scan_max_version(base_dir)
+        _VERSION_CACHE[key] = cur + 1
+    return f"v{cur + 1}"
+
+def _forget_versions(base_dir: pathlib.Path) -> None:
+    """Drop the cached version counter after files in base_dir are deleted or renamed."""
+    with _VERSION_LOCK:
+        _VERSION_CACHE.pop(str(base_dir), None)
+
+# Number of parsed .txt outputs reported by /logs; None means recount on next read
+_PARSED_TOTAL: Optional[int] = None
+_PARSED_LOCK = threading.Lock()
+
+def _parsed_total() -> int:
+    global _PARSED_TOTAL
+    with _PARSED_LOCK:
+        if _PARSED_TOTAL is None:
+            try:
+                _PARSED_TOTAL = sum(1 for _ in PARSED_ROOT.rglob("*.txt"))
+            except Exception:
+                return 0
+        return _PARSED_TOTAL
+
+def _adjust_parsed_total(delta: Optional[int]) -> None:
+    """Apply a known change to the parsed count, or pass None when it is unknown (forces a recount)."""
+    global _PARSED_TOTAL
+    with _PARSED_LOCK:
+        if delta is None:
+            _PARSED_TOTAL = None
+        elif _PARSED_TOTAL is not None:
+            _PARSED_TOTAL += delta
 
 
 def _parsed_output_dir_for(json_path: pathlib.Path) -> pathlib.Path:
@@ -320,6 +535,58 @@ def _parsed_output_dir_for(json_path: pathlib.Path) -> pathlib.Path:
     return (PARSED_ROOT / json_path.stem).resolve()
 
 
+def _child_path(base: str, name: str) -> Optional[str]:
+    """Return base/name if it names an entry directly inside base, else None.
+
+    base must already be resolved; the check is lexical (no realpath syscalls).
+    """
+    cand = os.path.normpath(os.path.join(base, name))
+    return cand if os.path.dirname(cand) == base else None
+
+
+@lru_cache(maxsize=512)
+def _tags_for(path_str: str, mtime_ns: int, size: int) -> tuple[frozenset[str], bool]:
+    """Tag names in a log's system prompt, and whether it has untagged content.
+
+    mtime_ns and size only key the cache, so an edited or truncated log is rescanned.
+    """
+    msgs = _json_loads(pathlib.Path(path_str).read_bytes()).get('messages', [])
+    first = msgs[0] if msgs else None
+    content = ""
+    if isinstance(first, dict) and first.get('role') == "system":
+        content = str(first.get('content', ""))
+    # One walk over the open/close markers collects the names and tracks top-level blocks;
+    # text between blocks, minus any stray markers, is what counts as untagged content.
+    tagset = set()
+    untagged = False
+    active = ""
+    depth = 0
+    pos = 0
+    for m in _TAG_MARKER_RE.finditer(content):
+        parts = m.group(2).split()
+        if not parts:
+            continue
+        if not m.group(1):
+            # Normalize to the bare tag name (before any attributes)
+            nm0 = parts[0]
+            tagset.add(nm0)
+            if not active:
+                if not untagged and _TAG_STRIP_RE.sub("", content[pos:m.start()]).strip():
+                    untagged = True
+                active = nm0.lower()
+                depth = 1
+            elif nm0.lower() == active:
+                depth += 1
+        elif active and len(parts) == 1 and parts[0].lower() == active:
+            depth -= 1
+            if depth == 0:
+                active = ""
+                pos = m.end()
+    # An unclosed block runs to the end of the text
+    if not active and not untagged and _TAG_STRIP_RE.sub("", content[pos:]).strip():
+        untagged = True
+    return frozenset(tagset), untagged
+
 def _resolve_log_path(name: str) -> Optional[pathlib.Path]:
     raw = str(name or '').strip()
     if not raw:
@@ -336,40 +603,63 @@ def _resolve_log_path(name: str) -> Optional[pathlib.Path]:
     return None
 
 
-def _build_parser_args(json_path: pathlib.Path, override: Optional[Dict] = None) -> list[str]:
-    args = [sys.executable, str(pathlib.Path(__file__).parent / "parser" / "parser.py")]
-    settings = override or PARSER_SETTINGS
-    mode = str(settings.get("mode", "default")).lower()
-    include_tags = [str(x).strip() for x in settings.get("include_tags", []) if str(x).strip()]
-    exclude_tags = [str(x).strip() for x in settings.get("exclude_tags", []) if str(x).strip()]
-    if mode == "custom":
-        # Always run in custom preset; choose include or omit flags accordingly
-        args += ["--preset", "custom"]
-        if include_tags:
-            args += ["--include-tags", ",".join(include_tags)]
-        elif exclude_tags:
-            args += ["--omit-tags", ",".join(exclude_tags)]
-        else:
-            # Force include-only mode with an empty include set (include nothing)
-            args += ["--include-mode"]
-    else:
-        args += ["--preset", "default"]
+def _sorted_log_jsons() -> list[pathlib.Path]:
+    """Log JSONs newest first, from one scandir pass (stat comes from the cached DirEntry)."""
+    entries = []
+    with os.scandir(LOG_DIR) as it:
+        for e in it:
+            if not e.name.endswith(".json"):
+                continue
+            try:
+                if e.is_file():
+                    entries.append((e.name, e.stat().st_mtime))
+            except OSError:
+                continue
+    entries.sort(key=lambda t: t[1], reverse=True)
+    return [LOG_DIR / n for n, _ in entries]
+
+
+def _newest_log_json() -> Optional[pathlib.Path]:
+    """Most recently modified log JSON, found in O(n) without building a sorted list."""
+    best = None
+    best_mtime = 0.0
+    with os.scandir(LOG_DIR) as it:
+        for e in it:
+            if not e.name.endswith(".json"):
+                continue
+            try:
+                if not e.is_file():
+                    continue
+                mtime = e.stat().st_mtime
+            except OSError:
+                continue
+            if best is None or mtime > best_mtime:
+                best, best_mtime = e.name, mtime
+    return LOG_DIR / best if best is not None else None
+
+
+def _parser_cmd(override: Optional[Dict] = None) -> tuple[str, ...]:
+    """Interpreter, script and preset/tag flags: the part of the argv shared by every target."""
+    return (*_PARSER_CMD_PREFIX, *_parser_flags(override or _parser_settings()))
+
+def _build_parser_args(json_path: pathlib.Path, override: Optional[Dict] = None,
+                       cmd: Optional[tuple[str, ...]] = None) -> list[str]:
+    # cmd: a precomputed _parser_cmd(override), for batches that share the same settings
+    if cmd is None:
+        cmd = _parser_cmd(override)
     # Output routing and versioning
     out_dir = _parsed_output_dir_for(json_path)
     suffix = _next_version_suffix_for(json_path)
-    args += ["--output-dir", str(out_dir), "--suffix", suffix]
-
     # no persona mapping; persona tag is always 'UserPersona'
-    args.append(str(json_path))
-    return args
+    return [*cmd, "--output-dir", str(out_dir), "--suffix", suffix, str(json_path)]
 
 def _validate_payload(pl: dict) -> dict:
-    if not CONFIG["security"]["validate_requests"]:
+    if not VALIDATE_REQUESTS:
         return pl
     if not isinstance(pl, dict) or not isinstance(pl.get("messages"), list):
         raise ValueError("`messages` must be an array")
 
-    messages = pl["messages"][: CONFIG["security"]["max_messages"]]
+    messages = pl["messages"][:MAX_MESSAGES]
 
     def clamp(value, lo, hi, cast, default):
         try:
@@ -378,7 +668,7 @@ def _validate_payload(pl: dict) -> dict:
             return max(lo, min(hi, cast(default)))
 
     out = {
-        "model": str(pl.get("model", ""))[: CONFIG["security"]["max_model_length"]],
+        "model": str(pl.get("model", ""))[:MAX_MODEL_LEN],
         "messages": messages,
         "stream": bool(pl.get("stream", False)),
     }
@@ -386,6 +676,13 @@ def _validate_payload(pl: dict) -> dict:
         out[key] = clamp(pl.get(key, GEN_CFG[key]), lo, hi, cast, GEN_CFG[key])
     return out
 
+# Server-side fallback credentials, fixed at startup; None unless explicitly allowed
+_STATIC_AUTH: Optional[Dict[str, str]] = (
+    {"Authorization": f"Bearer {CONFIG['openrouter']['api_key']}"}
+    if CONFIG["openrouter"].get("allow_server_api_key") and CONFIG["openrouter"].get("api_key")
+    else None
+)
+
 def _auth_headers(client_auth: str) -> dict:
     """Build upstream Authorization header with safe defaults.
 
@@ -393,16 +690,16 @@ def _auth_headers(client_auth: str) -> dict:
     - Only fall back to a server-side API key if explicitly enabled via
       ALLOW_SERVER_API_KEY=true (or config openrouter.allow_server_api_key).
     - Never forward client tokens in non-standard headers.
+
+    The server-side fallback is a shared dict; callers must copy before modifying.
     """
-    headers: Dict[str, str] = {}
     client_auth = (client_auth or "").strip()
     if client_auth:
-        headers["Authorization"] = client_auth
-        return headers
+        return {"Authorization": client_auth}
+    return _STATIC_AUTH or {}
 
-    if CONFIG["openrouter"].get("allow_server_api_key") and CONFIG["openrouter"].get("api_key"):
-        headers["Authorization"] = f"Bearer {CONFIG['openrouter']['api_key']}"
-    return headers
+# OpenRouter's SSE keep-alive comment, dropped from relayed streams
+_SSE_KEEPALIVE = b": OPENROUTER PROCESSING\n\n"
 
 def _stream_back(payload: dict, headers: dict):
     try:
@@ -410,17 +707,75 @@ def _stream_back(payload: dict, headers: dict):
         hdrs.setdefault("Accept", "text/event-stream")
         with _do_stream(json=payload, headers=hdrs) as r:
             r.raise_for_status()
-            for chunk in r.iter_lines():
-                # OpenRouter streams Server-Sent Events already ("data: {...}\n\n")
-                if chunk and chunk != b": OPENROUTER PROCESSING":
-                    yield chunk + b"\n\n"
+            # OpenRouter streams Server-Sent Events already ("data: {...}\n\n"), so forward
+            # the raw bytes as they arrive instead of re-splitting and re-framing lines
+            for chunk in r.iter_content(chunk_size=8192):
+                # Drop keep-alive comments; one split across chunks is still a valid SSE comment
+                chunk = chunk.replace(_SSE_KEEPALIVE, b"")
+                if chunk:
+                    yield chunk
     except requests.exceptions.RequestException as e:
         err = {"error": {"message": str(e), "type": "stream_error"}}
         yield f"data: {json.dumps(err)}\n\n".encode()
 
 # ── app ──────────────────────────────────────────────────────
+def _not_modified(etag: str) -> Optional[Response]:
+    """A 304 for a request whose If-None-Match already names etag, else None."""
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag, weak=True)
+        return resp
+    return None
+
+
+class _OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; defers to the stdlib for anything orjson rejects.
+
+    That includes NaN/Infinity, which orjson would silently turn into null.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Pretty-printing (debug mode) and custom encoder classes stay on the stdlib path
+        if not kwargs.get("indent") and "cls" not in kwargs:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+            try:
+                out = orjson.dumps(obj, default=self.default, option=option)
+            except TypeError:
+                pass
+            else:
+                if b"null" not in out or not _has_nonfinite(obj):
+                    return out.decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # jsonify(): hand orjson's bytes straight to the Response instead of str -> encode
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if not pretty:
+            obj = self._prepare_response_obj(args, kwargs)
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+            try:
+                body = orjson.dumps(obj, default=self.default, option=option | orjson.OPT_APPEND_NEWLINE)
+            except TypeError:
+                pass
+            else:
+                if b"null" not in body or not _has_nonfinite(obj):
+                    return self._app.response_class(body, mimetype=self.mimetype)
+        return super().response(*args, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass  # NaN/Infinity literals, non-UTF-8 bodies: let the stdlib decide
+        return super().loads(s, **kwargs)
+
+
 def create_app() -> Flask:
     app = Flask(__name__, static_folder='static', static_url_path='/static')
+    if orjson is not None:
+        # Covers request.get_json() and jsonify() in every route below
+        app.json = _OrjsonProvider(app)
     # Honor X-Forwarded-* headers from cloudflared so url_for and request.url_root are correct
     try:
         from werkzeug.middleware.proxy_fix import ProxyFix
@@ -454,7 +809,7 @@ def create_app() -> Flask:
                 "status": "alive",
                 "message": "Proxy alive - POST your /chat/completions here",
                 "version": "2.0",
-                "config": {"max_messages": CONFIG["security"]["max_messages"]},
+                "config": {"max_messages": MAX_MESSAGES},
             })
         return _handle_completion()
 
@@ -475,8 +830,8 @@ def create_app() -> Flask:
         if not isinstance(payload_in, dict):
             return jsonify({"error": "Request body must be a JSON object"}), 400
 
-        # fire-and-forget log write (synchronous but quick, no thread)
-        _save_log(dict(payload_in))
+        # fire-and-forget: the log worker owns the payload from here (nothing below mutates it)
+        _save_log(payload_in)
 
         try:
             payload = _validate_payload(payload_in)
@@ -528,31 +883,32 @@ def create_app() -> Flask:
 
     @app.route("/logs")
     def list_logs():
-        files = sorted(LOG_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        # One scandir pass: each entry is stat'ed once and no Path objects are built
         items = []
         since_start = 0
-        for p in files:
-            try:
-                st = p.stat()
+        with os.scandir(LOG_DIR) as it:
+            for e in it:
+                if not e.name.endswith(".json"):
+                    continue
+                try:
+                    if not e.is_file():
+                        continue
+                    st = e.stat()
+                except OSError:
+                    continue
                 mtime = st.st_mtime
                 if mtime >= STARTED_EPOCH:
                     since_start += 1
-                items.append({"name": p.name, "mtime": mtime, "size": st.st_size})
-            except Exception:
-                continue
-        # Total parsed txts (all-time)
-        parsed_total = 0
-        try:
-            for _ in PARSED_ROOT.rglob("*.txt"):
-                parsed_total += 1
-        except Exception:
-            parsed_total = 0
+                items.append({"name": e.name, "mtime": mtime, "size": st.st_size})
+        items.sort(key=lambda it: it["mtime"], reverse=True)
+        # Total parsed txts (all-time), maintained as outputs are written and deleted
+        parsed_total = _parsed_total()
         names = [it["name"] for it in items[:50]]
         return jsonify({
             "logs": names,
             "items": items[:200],
             "total": since_start,
-            "total_all": len(files),
+            "total_all": len(items),
             "parsed_total": parsed_total,
             "recent": names
         })
@@ -624,14 +980,22 @@ def create_app() -> Flask:
         else:
             stem = pathlib.Path(safe + ".json").stem
         base_dir = _parsed_output_dir_for(LOG_DIR / f"{stem}.json")
-        target = (base_dir / fname).resolve()
+        base = str(base_dir)
+        # Lexical containment check; base_dir is already resolved, so no realpath per request
+        target = os.path.normpath(os.path.join(base, fname))
         try:
-            # Ensure target is inside base_dir
-            if base_dir not in target.parents:
+            if not target.startswith(base + os.sep):
                 return jsonify({"error": "Invalid path"}), 400
-            if target.exists() and target.is_file() and target.suffix.lower() == ".txt":
-                return target.read_text(encoding="utf-8-sig"), 200, {"Content-Type": "text/plain; charset=utf-8"}
-            return jsonify({"error": f"{fname} not found"}), 404
+            if os.path.splitext(target)[1].lower() != ".txt":
+                return jsonify({"error": f"{fname} not found"}), 404
+            if not os.path.isfile(target):
+                return jsonify({"error": f"{fname} not found"}), 404
+            # Stream the file as stored (BOM included; UTF-8 decoders drop it). Conditional
+            # requests get a 304, and max_age=0 makes browsers revalidate renamed/rewritten files.
+            return send_from_directory(
+                base, os.path.relpath(target, base),
+                mimetype="text/plain", conditional=True, etag=True, max_age=0,
+            )
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -650,20 +1014,25 @@ def create_app() -> Flask:
         base_dir = _parsed_output_dir_for(LOG_DIR / f"{stem}.json")
         results = []
         deleted = 0
+        base = str(base_dir)
         for fn in files:
             try:
-                p = (base_dir / pathlib.Path(fn).name).resolve()
-                if base_dir not in p.parents or p.suffix.lower() != '.txt':
+                cand = _child_path(base, pathlib.Path(fn).name)
+                if cand is None or os.path.splitext(cand)[1].lower() != '.txt':
                     results.append({"file": fn, "ok": False, "error": "invalid path"})
                     continue
-                if p.exists() and p.is_file():
-                    p.unlink()
-                    deleted += 1
-                    results.append({"file": fn, "ok": True})
-                else:
+                try:
+                    os.unlink(cand)
+                except FileNotFoundError:
                     results.append({"file": fn, "ok": False, "error": "not found"})
+                    continue
+                deleted += 1
+                results.append({"file": fn, "ok": True})
             except Exception as e:
                 results.append({"file": fn, "ok": False, "error": str(e)})
+        if deleted:
+            _forget_versions(base_dir)
+            _adjust_parsed_total(-deleted)
         return jsonify({"deleted": deleted, "results": results})
 
     @app.route("/logs/delete", methods=["POST"])
@@ -678,34 +1047,32 @@ def create_app() -> Flask:
             return jsonify({"deleted": 0, "results": [], "error": "no files provided"}), 400
         results = []
         deleted = 0
+        log_dir = str(LOG_DIR)
         for raw in files:
             try:
                 safe = _safe_name(raw)
                 if not safe.endswith('.json'):
                     safe += '.json'
-                p = (LOG_DIR / safe).resolve()
-                if LOG_DIR not in p.parents:
+                cand = _child_path(log_dir, safe)
+                if cand is None:
                     results.append({"file": raw, "ok": False, "error": "invalid path"})
                     continue
                 # Delete JSON file
-                if p.exists() and p.is_file():
-                    p.unlink()
-                else:
+                try:
+                    os.unlink(cand)
+                except FileNotFoundError:
                     results.append({"file": raw, "ok": False, "error": "not found"})
                     continue
+                p = pathlib.Path(cand)
                 # Delete parsed directory if present
                 try:
                     parsed_dir = _parsed_output_dir_for(p)
-                    if parsed_dir.exists() and parsed_dir.is_dir():
-                        for sub in parsed_dir.glob("*"):
-                            try:
-                                sub.unlink()
-                            except Exception:
-                                pass
-                        try:
-                            parsed_dir.rmdir()
-                        except Exception:
-                            pass
+                    _forget_versions(parsed_dir)
+                    if parsed_dir.is_dir():
+                        removed_txt = sum(1 for _ in parsed_dir.rglob("*.txt"))
+                        shutil.rmtree(parsed_dir, ignore_errors=True)
+                        # Partial failure leaves an unknown number behind; recount then
+                        _adjust_parsed_total(None if parsed_dir.exists() else -removed_txt)
                 except Exception:
                     pass
                 deleted += 1
@@ -737,6 +1104,8 @@ def create_app() -> Flask:
             # Move parsed dir if present
             old_dir = _parsed_output_dir_for(old_path)
             new_dir = _parsed_output_dir_for(new_path)
+            _forget_versions(old_dir)
+            _forget_versions(new_dir)
             if old_dir.exists() and old_dir.is_dir():
                 try:
                     old_dir.rename(new_dir)
@@ -769,41 +1138,32 @@ def create_app() -> Flask:
                 return jsonify({"error": "Source file not found"}), 404
             if new_p.exists():
                 return jsonify({"error": "Destination already exists"}), 409
-            new_p.write_text(old_p.read_text(encoding='utf-8-sig'), encoding='utf-8-sig')
-            try:
-                old_p.unlink()
-            except Exception:
-                pass
+            # Same directory, so a plain rename: no copy, and the bytes (BOM included) are kept as-is
+            os.replace(old_p, new_p)
+            _forget_versions(base_dir)
             return jsonify({"old": old_p.name, "new": new_p.name})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     @app.route("/parser-settings", methods=["GET", "POST"])
     def parser_settings():
-        global PARSER_SETTINGS
+        settings = _parser_settings()
         if request.method == "POST":
             data = request.get_json(silent=True) or {}
-            mode = str(data.get("mode", PARSER_SETTINGS.get("mode", "default"))).lower()
+            mode = str(data.get("mode", settings.get("mode", "default"))).lower()
             if mode not in ("default", "custom"):
                 mode = "default"
 
-            def _norm_list(v):
-                if isinstance(v, str):
-                    return [s.strip() for s in v.split(',') if s.strip()]
-                if isinstance(v, list):
-                    return [str(s).strip() for s in v if str(s).strip()]
-                return []
-
             # Persist exclusions only; include tags are ephemeral
-            exclude_tags = _norm_list(data.get("exclude_tags", PARSER_SETTINGS.get("exclude_tags", [])))
-            PARSER_SETTINGS = {
+            exclude_tags = _norm_list(data.get("exclude_tags", settings.get("exclude_tags", [])))
+            settings = {
                 "mode": mode,
                 "include_tags": [],
                 "exclude_tags": exclude_tags,
             }
-            _save_parser_settings(PARSER_SETTINGS)
+            _save_parser_settings(settings)
         # Never return persisted include_tags
-        resp = dict(PARSER_SETTINGS)
+        resp = dict(settings)
         resp["include_tags"] = []
         return jsonify(resp)
 
@@ -811,15 +1171,9 @@ def create_app() -> Flask:
     def parser_rewrite():
         data = request.get_json(silent=True) or {}
         mode = str(data.get("mode", "all")).lower()
+        settings = _parser_settings()
         # Optional per-request parser overrides
-        parser_mode = str(data.get("parser_mode", PARSER_SETTINGS.get("mode", "default"))).lower()
-
-        def _norm_list(v):
-            if isinstance(v, str):
-                return [s.strip() for s in v.split(',') if s.strip()]
-            if isinstance(v, list):
-                return [str(s).strip() for s in v if str(s).strip()]
-            return []
+        parser_mode = str(data.get("parser_mode", settings.get("mode", "default"))).lower()
 
         include_override = _norm_list(data.get("include_tags", []))
         exclude_override = _norm_list(data.get("exclude_tags", []))
@@ -828,7 +1182,7 @@ def create_app() -> Flask:
         override_settings = {
             "mode": parser_mode,
             "include_tags": include_override,
-            "exclude_tags": (exclude_override if provided_exclude else PARSER_SETTINGS.get("exclude_tags", [])),
+            "exclude_tags": (exclude_override if provided_exclude else settings.get("exclude_tags", [])),
         }
 
         files_in = data.get("files", [])
@@ -840,36 +1194,64 @@ def create_app() -> Flask:
                 if resolved and resolved not in seen:
                     targets.append(resolved)
                     seen.add(resolved)
+        elif mode == "latest":
+            newest = _newest_log_json()
+            targets = [newest] if newest is not None else []
         else:
-            files = sorted(LOG_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-            targets = files if mode != "latest" else (files[:1] if files else [])
+            targets = _sorted_log_jsons()
 
-        results = []
-        for t in targets:
+        # The flags are the same for every target; only output dir, suffix and path vary.
+        # On bad settings leave cmd unset so each target reports the error as before.
+        try:
+            cmd = _parser_cmd(override_settings)
+        except Exception:
+            cmd = None
+
+        def _run_one(t: pathlib.Path) -> dict:
             try:
-                args = _build_parser_args(t, override=override_settings)
+                args = _build_parser_args(t, override=override_settings, cmd=cmd)
                 res = subprocess.run(args, capture_output=True, text=True)
                 ok = res.returncode == 0
-                results.append({
+                return {
                     "file": t.name,
                     "ok": ok,
                     "stdout": res.stdout.strip(),
                     "stderr": res.stderr.strip(),
-                })
+                }
             except Exception as e:
-                results.append({"file": t.name, "ok": False, "error": str(e)})
+                return {"file": t.name, "ok": False, "error": str(e)}
+
+        # Each target is an independent child process; run them side by side (results keep target order)
+        if len(targets) > 1:
+            workers = min(len(targets), os.cpu_count() or 2)
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                results = list(ex.map(_run_one, targets))
+        else:
+            results = [_run_one(t) for t in targets]
+        if targets:
+            # The CLI runs out of process; recount instead of inferring outputs from its stdout
+            _adjust_parsed_total(None)
         return jsonify({"rewritten": len(results), "results": results})
 
     @app.route("/tunnel", methods=["GET"])
     def tunnel():
+        p = BASE_DIR / "var/state/tunnel_url.txt"
         try:
-            p = BASE_DIR / "var/state/tunnel_url.txt"
-            if p.exists():
-                url = p.read_text(encoding="utf-8").strip()
-                return jsonify({"url": url})
+            st = p.stat()
+        except OSError:
+            return jsonify({"url": ""})
+        # Polled by the UI; the file only changes when the tunnel restarts
+        etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        try:
+            url = p.read_text(encoding="utf-8").strip()
         except Exception:
-            pass
-        return jsonify({"url": ""})
+            return jsonify({"url": ""})
+        resp = jsonify({"url": url})
+        resp.set_etag(etag, weak=True)
+        return resp
 
     @app.route("/parser-tags", methods=["GET"])
     def parser_tags():
@@ -892,7 +1274,6 @@ def create_app() -> Flask:
                 if n:
                     names_in.add(n)
 
-        files = sorted(LOG_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
         targets = []
         if names_in:
             for raw in names_in:
@@ -903,78 +1284,66 @@ def create_app() -> Flask:
                 if cand.exists():
                     targets.append(cand)
         else:
-            if files:
-                targets = [files[0]]
+            # Directory scan only when no explicit files were requested
+            newest = _newest_log_json()
+            if newest is not None:
+                targets = [newest]
 
         if not targets:
             return jsonify({"tags": [], "files": [], "by_file": {}, "by_tag": {}})
 
+        stats = []
+        for target in targets:
+            try:
+                stats.append((target, target.stat()))
+            except OSError:
+                continue
+        # The response is a function of the selected files' (name, mtime, size); the start
+        # time salts it so a restarted (possibly upgraded) server never answers 304 to old tags
+        digest = hashlib.blake2b(repr(STARTED_EPOCH).encode(), digest_size=16)
+        for target, st in stats:
+            digest.update(f"{target.name}:{st.st_mtime_ns}:{st.st_size};".encode())
+        etag = digest.hexdigest()
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
         names = set()
         used = []
         file_to_tags: Dict[str, list[str]] = {}
-        for target in targets:
+        for target, st in stats:
             try:
-                data = json.loads(target.read_text(encoding='utf-8'))
-                msgs = data.get('messages', [])
-                content = ""
-                if msgs and isinstance(msgs[0], dict) and msgs[0].get('role') == "system":
-                    content = str(msgs[0].get('content', ""))
-                tagset = set()
-                for m in re.finditer(r"<\s*([^<>/]+?)\s*>", content, re.IGNORECASE):
-                    nm = m.group(1).strip()
-                    if not nm:
-                        continue
-                    # Normalize to the bare tag name (before any attributes)
-                    nm0 = nm.split()[0]
-                    if nm0:
-                        names.add(nm0)
-                        tagset.add(nm0)
-                # Detect untagged content: remove all detected tag blocks and any stray tag markers,
-                # then see if any non-whitespace remains.
-                if content:
-                    stripped = content
-                    for nm in list(tagset):
-                        try:
-                            stripped = _remove_tag_blocks(stripped, nm)
-                        except Exception:
-                            # Best-effort; continue if any edge case
-                            pass
-                    # Remove any remaining tag markers like <foo> or </foo>
-                    stripped = re.sub(r"</?[^<>/]+?[^<>]*>", "", stripped)
-                    # If anything other than whitespace remains, treat as 'Untagged Content'
-                    if stripped and stripped.strip():
-                        tagset.add('Untagged Content')
-                        names.add('Untagged Content')
-                used.append(target.name)
-                file_to_tags[target.name] = sorted({t.strip() for t in tagset if t.strip()}, key=lambda x: x.lower())
+                tags, untagged = _tags_for(str(target), st.st_mtime_ns, st.st_size)
             except Exception:
                 continue
-
-        tag_to_files: Dict[str, list[str]] = {}
+            names.update(tags)
+            if untagged:
+                tags = tags | {'Untagged Content'}
+                names.add('Untagged Content')
+            used.append(target.name)
+            # tags is already a set of stripped, non-empty names
+            file_to_tags[target.name] = sorted(tags, key=str.lower)
+
+        by_tag: defaultdict[str, list[str]] = defaultdict(list)
         for fname, tags in file_to_tags.items():
             for t in tags:
-                tag_to_files.setdefault(t, []).append(fname)
-        for t, lst in tag_to_files.items():
-            tag_to_files[t] = sorted(lst)
-        return jsonify({
-            "tags": sorted(names, key=lambda x: x.lower()),
+                by_tag[t].append(fname)
+        # Each file name appears once per tag (file_to_tags is keyed by file, tags are a set)
+        tag_to_files = {t: sorted(lst) for t, lst in by_tag.items()}
+        resp = jsonify({
+            "tags": sorted(names, key=str.lower),
             "files": used,
             "by_file": file_to_tags,
             "by_tag": tag_to_files,
         })
+        resp.set_etag(etag, weak=True)
+        return resp
 
     @app.route("/export-sillytavern", methods=["POST"])
     def export_sillytavern():
         """Export parsed TXT files to SillyTavern-compatible JSON."""
         data = request.get_json(silent=True) or {}
 
-        def _norm_list(v):
-            if isinstance(v, str):
-                return [s.strip() for s in v.split(',') if s.strip()]
-            if isinstance(v, list):
-                return [str(s).strip() for s in v if str(s).strip()]
-            return []
-
         exports = []
 
         # Export from existing parsed TXT files
@@ -994,15 +1363,19 @@ def create_app() -> Flask:
 
         for txt_file in txt_files:
             try:
-                txt_path = (base_dir / pathlib.Path(txt_file).name).resolve()
-                if not txt_path.exists() or txt_path.suffix.lower() != '.txt':
+                # base_dir is already resolved and only a bare file name is appended, so no
+                # realpath/exists round trips: a missing file is just a failed open
+                txt_path = base_dir / pathlib.PurePath(txt_file).name
+                if txt_path.suffix.lower() != '.txt':
+                    continue
+                try:
+                    content = txt_path.read_text(encoding='utf-8-sig')
+                except FileNotFoundError:
                     continue
-
-                content = txt_path.read_text(encoding='utf-8-sig')
 
                 # Name is filename minus .txt, then strip version suffix (.v1, .v2, etc.)
                 name = txt_path.stem
-                name = re.sub(r"\.v\d+$", "", name)
+                name = _VERSION_SUFFIX_RE.sub("", name)
 
                 # Split by "First Message" marker
                 first_mes_marker = "First Message"
@@ -1019,7 +1392,7 @@ def create_app() -> Flask:
 
                 # Build the JSON
                 st_json = _build_sillytavern_json(name, description, scenario, first_mes)
-                safe_filename = re.sub(r"[^0-9A-Za-z _\-()&]+", "_", name).strip() or "character"
+                safe_filename = _FILENAME_SCRUB_RE.sub("_", name).strip() or "character"
 
                 exports.append({
                     "name": name,
@@ -1083,5 +1456,20 @@ if __name__ == "__main__":
     if CONFIG["openrouter"].get("api_key") and not CONFIG["openrouter"].get("allow_server_api_key"):
         log.info("Server API key present but disabled by default (ALLOW_SERVER_API_KEY=false). Requests must supply Authorization header.")
     log.info(f"Allowed origins: {CONFIG['server']['allowed_origins']}")
-    
-    app.run(host="0.0.0.0", port=LISTEN_PORT, threaded=True, debug=False)
+
+    # --dev forces the Flask development server even when waitress is available
+    dev = "--dev" in sys.argv[1:]
+    serve = None
+    if not dev:
+        try:
+            from waitress import serve
+        except ImportError:
+            log.warning("waitress not installed; falling back to the Flask development server")
+    if serve is not None:
+        # Thread pool, not worker processes: the log queue, version counters and parsed
+        # count are per-process state, and requests mostly wait on the upstream anyway.
+        threads = max(1, CONFIG["server"]["threads"])
+        log.info(f"Serving with waitress ({threads} threads)")
+        serve(app, host="0.0.0.0", port=LISTEN_PORT, threads=threads)
+    else:
+        app.run(host="0.0.0.0", port=LISTEN_PORT, threaded=True, debug=False)